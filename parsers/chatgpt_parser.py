@@ -3,9 +3,19 @@
 Wrapper for V1 ChatGPT parser to work with PyO3 bridge
 """
 import sys
-import json
+from functools import partial
 from pathlib import Path
-from datetime import datetime
+
+from parser_common import format_timestamp, intern_str, iter_json_array, map_conversations, materialize, write_ndjson
+
+try:
+    import numpy as np
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Below this many messages, converting to arrays costs more than the JIT saves
+JIT_MIN_MESSAGES = 2048
 
 # Add V1 project to path
 sys.path.insert(0, '/home/bijan/LLMArchGH/biji20LLMArchiv')
@@ -16,128 +26,279 @@ try:
 except ImportError:
     V1_AVAILABLE = False
 
-def parse_export(file_path):
-    """Parse ChatGPT export file and return normalized format"""
-    conversations = []
+# Number of characters kept per message when content_mode='preview'
+PREVIEW_CHARS = 512
+
+CONTENT_MODES = ('full', 'preview', 'lazy')
+
+def join_parts(parts):
+    """Join the non-empty content parts of a message with newlines"""
+    if len(parts) == 1:
+        # Most messages have a single string part, skip the join
+        part = parts[0]
+        if not part:
+            return ''
+        return part if isinstance(part, str) else str(part)
+    return '\n'.join(p if isinstance(p, str) else str(p) for p in parts if p)
+
+def preview_parts(parts, limit=PREVIEW_CHARS):
+    """Join only as many parts as needed for the first limit characters"""
+    preview = []
+    size = 0
+    for part in parts:
+        if not part:
+            continue
+        part = part if isinstance(part, str) else str(part)
+        preview.append(part)
+        size += len(part) + 1
+        if size >= limit:
+            break
+    return '\n'.join(preview)[:limit]
+
+class LazyContent:
+    """Message content that is only joined from its parts when converted to str"""
+    __slots__ = ('parts', 'joined')
     
-    if V1_AVAILABLE:
-        # Use V1 parser
-        provider = ChatGPTProvider(None)  # No DB needed for parsing
-        # The V1 parser expects a different interface, so we'll parse directly
+    def __init__(self, parts):
+        self.parts = parts
+        self.joined = None
     
-    # Fall back to direct parsing
-    with open(file_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    for conv_data in data:
-        try:
-            conversation = {
-                'id': conv_data.get('conversation_id', conv_data.get('id')),
-                'title': conv_data.get('title', 'Untitled'),
-                'created_at': datetime.fromtimestamp(conv_data.get('create_time', 0)).isoformat(),
-                'updated_at': datetime.fromtimestamp(conv_data.get('update_time', conv_data.get('create_time', 0))).isoformat(),
-                'model': conv_data.get('default_model_slug'),
-                'messages': []
-            }
-            
-            # Extract metadata
-            if 'gizmo_id' in conv_data:
-                conversation['gizmo_id'] = conv_data['gizmo_id']
-            
-            # Parse messages from mapping
-            mapping = conv_data.get('mapping', {})
-            messages_by_id = {}
-            
-            # First pass: create all messages
-            for node_id, node in mapping.items():
-                if node.get('message'):
-                    msg = node['message']
-                    author = msg.get('author', {})
-                    
-                    message = {
-                        'id': msg.get('id', node_id),
-                        'role': author.get('role', 'unknown'),
-                        'content': '',
-                        'created_at': datetime.fromtimestamp(msg.get('create_time', 0)).isoformat() if msg.get('create_time') else conversation['created_at'],
-                        'parent': node.get('parent'),
-                        'model': msg.get('metadata', {}).get('model_slug')
-                    }
-                    
-                    # Extract content
-                    content_obj = msg.get('content', {})
-                    if content_obj.get('content_type') == 'text':
-                        parts = content_obj.get('parts', [])
-                        if parts:
-                            message['content'] = '\n'.join(str(p) for p in parts if p)
-                    elif 'text' in content_obj:
-                        message['content'] = content_obj['text']
-                    
-                    # Extract metadata
-                    metadata = msg.get('metadata', {})
-                    if metadata:
-                        if 'finish_details' in metadata:
-                            message['finish_reason'] = metadata['finish_details'].get('type')
-                        if 'model_slug' in metadata:
-                            message['model'] = metadata['model_slug']
-                    
-                    messages_by_id[node_id] = message
-            
-            # Second pass: build conversation flow
-            def get_message_chain(node_id, visited=None):
-                if visited is None:
-                    visited = set()
-                if node_id in visited or node_id not in messages_by_id:
-                    return []
-                visited.add(node_id)
-                
-                message = messages_by_id[node_id]
-                chain = []
-                
-                # Add parent messages first
-                if message['parent'] and message['parent'] in messages_by_id:
-                    chain.extend(get_message_chain(message['parent'], visited))
-                
-                # Add this message
-                chain.append(message)
-                
-                return chain
+    def __str__(self):
+        # Join once, later conversions reuse the result
+        if self.joined is None:
+            self.joined = join_parts(self.parts)
+        return self.joined
+
+class ChainMessage:
+    """Lightweight message held while the conversation chain is selected"""
+    __slots__ = ('id', 'role', 'content', 'created_at', 'parent', 'model', 'finish_reason')
+    
+    def __init__(self, id, role, created_at, parent, model):
+        self.id = id
+        self.role = role
+        self.content = ''
+        self.created_at = created_at
+        self.parent = parent
+        self.model = model
+        self.finish_reason = None
+    
+    def to_dict(self):
+        """Convert to the normalized message dict handed to the bridge"""
+        message = {
+            'id': self.id,
+            'role': self.role,
+            'content': self.content,
+            'created_at': self.created_at,
+            'model': self.model,
+        }
+        if self.finish_reason is not None:
+            message['finish_reason'] = self.finish_reason
+        return message
+
+def get_message_chain(messages_by_id, leaf_id):
+    """Walk parent pointers from a leaf up to the root, returned root-first"""
+    chain = []
+    node_id = leaf_id
+    # The mapping is a tree, but bound the walk in case a corrupt export has a cycle
+    limit = len(messages_by_id)
+    while node_id and node_id in messages_by_id and len(chain) < limit:
+        message = messages_by_id[node_id]
+        chain.append(message)
+        node_id = message.parent
+    chain.reverse()
+    return chain
+
+def get_chain_depth(messages_by_id, depth, node_id):
+    """Count the unbroken run of messages from a node up towards the root
+    
+    Parents are read from the already built messages rather than the raw
+    mapping, which may be a lazy simdjson object with linear key lookups.
+    A node without a message is not in messages_by_id, so it ends the run
+    just like in get_message_chain. Depths are memoized in depth, so each
+    message is only walked once no matter how many descendants ask for it.
+    """
+    # Climb until we leave the messages or reach an ancestor whose depth is known
+    path = []
+    limit = len(messages_by_id)
+    while node_id not in depth and len(path) < limit:
+        message = messages_by_id.get(node_id)
+        if message is None:
+            break
+        path.append(node_id)
+        node_id = message.parent
+    
+    base = depth.get(node_id, 0)
+    for path_id in reversed(path):
+        base += 1
+        depth[path_id] = base
+    return base
+
+def get_deepest_node(messages_by_id):
+    """Return the message with the longest unbroken run of messages above it
+    
+    Ties go to the message that comes first in the mapping.
+    """
+    depth = {}
+    deepest_node = None
+    deepest = 0
+    for node_id in messages_by_id:
+        node_depth = get_chain_depth(messages_by_id, depth, node_id)
+        if node_depth > deepest:
+            deepest = node_depth
+            deepest_node = node_id
+    return deepest_node
+
+if njit is not None:
+    @njit(cache=True)
+    def _deepest_message_index(parent):
+        """Array version of get_deepest_node over interned message indices"""
+        n = parent.shape[0]
+        depth = np.zeros(n, np.int32)
+        path = np.empty(n, np.int32)
+        deepest_node = -1
+        deepest = 0
+        
+        for start in range(n):
+            top = 0
+            node = start
+            while node >= 0 and depth[node] == 0 and top < n:
+                path[top] = node
+                top += 1
+                node = parent[node]
             
-            # Find leaf nodes (messages with no children)
-            all_children = set()
-            for node_id, node in mapping.items():
-                for child in node.get('children', []):
-                    all_children.add(child)
+            base = depth[node] if node >= 0 else 0
+            while top > 0:
+                top -= 1
+                base += 1
+                depth[path[top]] = base
             
-            leaf_nodes = [node_id for node_id in mapping.keys() if node_id not in all_children and node_id in messages_by_id]
+            if base > deepest:
+                deepest = base
+                deepest_node = start
+        
+        return deepest_node
+
+def get_deepest_node_jit(messages_by_id):
+    """Same pick as get_deepest_node, but runs the walk as a Numba-compiled array loop"""
+    node_ids = list(messages_by_id)
+    index = {node_id: i for i, node_id in enumerate(node_ids)}
+    
+    # Parents without a message map to -1 and end the run
+    parent = np.fromiter(
+        (index.get(message.parent, -1) for message in messages_by_id.values()),
+        dtype=np.int32,
+        count=len(node_ids),
+    )
+    
+    deepest = _deepest_message_index(parent)
+    return node_ids[deepest] if deepest >= 0 else None
+
+def parse_conversation(conv_data, content_mode='full'):
+    """Normalize a single ChatGPT conversation"""
+    conversation = {
+        'id': conv_data.get('conversation_id', conv_data.get('id')),
+        'title': conv_data.get('title', 'Untitled'),
+        'created_at': format_timestamp(int(conv_data.get('create_time', 0))),
+        'updated_at': format_timestamp(int(conv_data.get('update_time', conv_data.get('create_time', 0)))),
+        'model': intern_str(conv_data.get('default_model_slug')),
+        'messages': []
+    }
+    
+    # Extract metadata
+    if 'gizmo_id' in conv_data:
+        conversation['gizmo_id'] = conv_data['gizmo_id']
+    
+    # Parse messages from mapping
+    mapping = conv_data.get('mapping', {})
+    messages_by_id = {}
+    
+    # Single pass: create all messages
+    for node_id, node in mapping.items():
+        if node.get('message'):
+            msg = node['message']
+            author = msg.get('author', {})
             
-            # If no leaf nodes found, try to find the current_node
-            if not leaf_nodes and 'current_node' in conv_data:
-                leaf_nodes = [conv_data['current_node']]
+            metadata = msg.get('metadata', {})
             
-            # Get the longest conversation chain
-            longest_chain = []
-            for leaf in leaf_nodes:
-                chain = get_message_chain(leaf)
-                if len(chain) > len(longest_chain):
-                    longest_chain = chain
+            message = ChainMessage(
+                id=msg.get('id', node_id),
+                role=intern_str(author.get('role', 'unknown')),
+                created_at=format_timestamp(int(msg['create_time'])) if msg.get('create_time') else conversation['created_at'],
+                parent=node.get('parent'),
+                model=intern_str(metadata.get('model_slug')),
+            )
             
-            # Remove parent field and add messages to conversation
-            for msg in longest_chain:
-                msg.pop('parent', None)
-                conversation['messages'].append(msg)
+            # Extract content
+            content_obj = msg.get('content', {})
+            if content_obj.get('content_type') == 'text':
+                parts = materialize(content_obj.get('parts', []))
+                if content_mode == 'lazy':
+                    message.content = LazyContent(parts)
+                elif content_mode == 'preview':
+                    message.content = preview_parts(parts)
+                else:
+                    message.content = join_parts(parts)
+            elif 'text' in content_obj:
+                text = content_obj['text']
+                # preview_parts also copes with a null or non-string text
+                message.content = preview_parts([text]) if content_mode == 'preview' else text
             
-            conversations.append(conversation)
+            # Extract metadata
+            if metadata and 'finish_details' in metadata:
+                message.finish_reason = metadata['finish_details'].get('type')
             
-        except Exception as e:
-            print(f"Error parsing conversation: {e}")
-            continue
+            messages_by_id[node_id] = message
     
-    return conversations
+    # current_node is the branch the user kept after regenerating or editing.
+    # Only walk the tree for the longest chain when it is missing, using the
+    # compiled kernel for very large trees.
+    end_node = conv_data.get('current_node')
+    if end_node not in messages_by_id:
+        if njit is not None and len(messages_by_id) >= JIT_MIN_MESSAGES:
+            end_node = get_deepest_node_jit(messages_by_id)
+        else:
+            end_node = get_deepest_node(messages_by_id)
+    
+    # Build conversation flow from the selected branch
+    chain = get_message_chain(messages_by_id, end_node) if end_node else []
+    
+    # Only the selected chain is converted to output dicts
+    conversation['messages'] = [msg.to_dict() for msg in chain]
+    
+    return conversation
+
+def parse_export(file_path, content_mode='full', workers=None):
+    """Parse ChatGPT export file, yielding each conversation in normalized format
+    
+    content_mode controls how message content is built: 'full' joins every
+    part, 'preview' keeps only the first PREVIEW_CHARS characters, and
+    'lazy' stores a LazyContent that joins the parts when converted to str.
+    workers > 1 parses conversations in a process pool.
+    """
+    # Validate here rather than in the generator so a bad mode fails at call time
+    if content_mode not in CONTENT_MODES:
+        raise ValueError(f"Unknown content_mode: {content_mode}")
+    return _iter_export(file_path, content_mode, workers)
+
+def _iter_export(file_path, content_mode, workers):
+    """Generator behind parse_export"""
+    if V1_AVAILABLE:
+        # Use V1 parser
+        provider = ChatGPTProvider(None)  # No DB needed for parsing
+        # The V1 parser expects a different interface, so we'll parse directly
+    
+    # Fall back to direct parsing, streaming one conversation at a time
+    parse_one = partial(parse_conversation, content_mode=content_mode)
+    yield from map_conversations(parse_one, iter_json_array(file_path), workers)
+
+def parse_export_ndjson(file_path, out_fp, content_mode='full'):
+    """Parse export file and write each conversation to out_fp as one JSON line"""
+    return write_ndjson(parse_export(file_path, content_mode), out_fp)
 
 if __name__ == '__main__':
     # Test the parser
     if len(sys.argv) > 1:
-        result = parse_export(sys.argv[1])
+        result = list(parse_export(sys.argv[1]))
         print(f"Parsed {len(result)} conversations")
         if result:
             print(f"First conversation has {len(result[0]['messages'])} messages")
\ No newline at end of file
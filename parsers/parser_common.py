@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for the provider export parsers
+"""
+import logging
+import mmap
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import lru_cache, partial
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    import json
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import simdjson
+except ImportError:
+    simdjson = None
+
+logger = logging.getLogger(__name__)
+
+# Per-conversation failures reported individually before only counting them
+MAX_REPORTED_ERRORS = 10
+
+def map_file(f):
+    """Memory-map an open file read-only, or return None if it cannot be mapped"""
+    try:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (ValueError, OSError):
+        # Empty files and pipes cannot be mapped
+        return None
+
+def load_json(file_path):
+    """Read an export file and decode it, preferring orjson when installed
+    
+    With orjson the file is memory-mapped and parsed in place, so large
+    exports are not first copied into a bytes object.
+    """
+    with open(file_path, 'rb') as f:
+        mapped = map_file(f) if orjson is not None else None
+        if mapped is not None:
+            try:
+                with memoryview(mapped) as view:
+                    return orjson.loads(view)
+            finally:
+                mapped.close()
+        
+        raw = f.read()
+    
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+def load_json_lazy(file_path):
+    """Read an export file as a lazily decoded simdjson document
+    
+    Only the fields that are actually accessed get converted to Python
+    objects. iter_json_array only reaches this when ijson is missing. A
+    simdjson parser refuses to parse again while values from
+    its previous document are alive, so every call gets its own parser
+    and several exports can be iterated at once. Falls back to load_json
+    when pysimdjson is not installed.
+    """
+    if simdjson is None:
+        return load_json(file_path)
+    
+    with open(file_path, 'rb') as f:
+        raw = f.read()
+    return simdjson.Parser().parse(raw)
+
+def iter_json_array(file_path):
+    """Yield the elements of a top-level JSON array one at a time
+    
+    With ijson installed the file is streamed, so only one element is held
+    in memory at once. ijson is preferred over simdjson on purpose: bounded
+    memory matters more for huge exports than decode speed. Without it the
+    whole document is decoded up front, lazily via load_json_lazy.
+    """
+    if ijson is None:
+        yield from load_json_lazy(file_path)
+        return
+    
+    with open(file_path, 'rb') as f:
+        yield from ijson.items(f, 'item', use_float=True)
+
+def materialize(value):
+    """Convert a lazy simdjson array/object into plain Python containers"""
+    if isinstance(value, (dict, list)):
+        return value
+    if hasattr(value, 'as_list'):
+        return value.as_list()
+    if hasattr(value, 'as_dict'):
+        return value.as_dict()
+    return value
+
+def _parse_or_error(parse_one, conv_data):
+    """Run parse_one in a worker, returning (conversation, error message)"""
+    try:
+        return parse_one(conv_data), None
+    except Exception as e:
+        return None, str(e)
+
+def _report_error(errors, error):
+    """Log one of the first MAX_REPORTED_ERRORS parse failures"""
+    if errors <= MAX_REPORTED_ERRORS:
+        logger.warning("Error parsing conversation: %s", error)
+
+def map_conversations(parse_one, conv_list, workers=None, chunksize=64):
+    """Yield parse_one(conv_data) for each raw conversation that parses
+    
+    Conversations that fail are skipped. Only the first MAX_REPORTED_ERRORS
+    are logged individually, followed by one total once the input is done,
+    so a badly corrupted export does not flood the log.
+    
+    Conversations are independent, so with workers > 1 they are spread
+    over a process pool. parse_one must then be picklable (a module-level
+    function or a partial of one). The pool reads all pending input, so
+    it trades streaming memory bounds for throughput. Keep the default
+    serial mode inside the PyO3 bridge, where forking the host process is
+    not safe.
+    """
+    errors = 0
+    
+    if workers is None or workers <= 1:
+        for conv_data in conv_list:
+            try:
+                conversation = parse_one(conv_data)
+            except Exception as e:
+                errors += 1
+                _report_error(errors, e)
+                continue
+            yield conversation
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Lazy simdjson values cannot be pickled, so send plain containers
+            plain = (materialize(conv_data) for conv_data in conv_list)
+            results = executor.map(partial(_parse_or_error, parse_one), plain, chunksize=chunksize)
+            for conversation, error in results:
+                if error is not None:
+                    errors += 1
+                    _report_error(errors, error)
+                    continue
+                yield conversation
+    
+    if errors:
+        logger.warning("Skipped %d conversations that failed to parse", errors)
+
+def parse_conversations(parse_conversation, conv_list, workers=None):
+    """Parse a loaded export into a list of normalized conversations
+    
+    parse_conversation(conv_data, now_iso) receives the fallback for
+    missing timestamps, computed once per export rather than per message.
+    """
+    parse_one = partial(parse_conversation, now_iso=datetime.now().isoformat())
+    return list(map_conversations(parse_one, conv_list, workers))
+
+# Sentinel that tells a missing key apart from one holding None
+_MISSING = object()
+
+def get_first(data, *keys, default=None):
+    """Return the value of the first of keys present in data
+    
+    Equivalent to data.get(a, data.get(b, default)), but stops at the first
+    match instead of evaluating every fallback lookup up front.
+    """
+    for key in keys:
+        value = data.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+    return default
+
+def message_id(msg_data, i, *keys):
+    """Return the id stored under the first of keys present, or msg_{i}
+    
+    Like get_first, a key holding None still counts as present. The
+    positional fallback is only formatted when none of the keys exist.
+    """
+    msg_id = get_first(msg_data, *keys, default=_MISSING)
+    return msg_id if msg_id is not _MISSING else f'msg_{i}'
+
+def intern_str(value):
+    """Intern a string so repeated roles and model names share one object"""
+    if isinstance(value, str):
+        return sys.intern(value)
+    return value
+
+def write_ndjson(conversations, out_fp):
+    """Write conversations to a binary file object as newline-delimited JSON
+    
+    Each conversation is serialized as soon as it is produced, so a
+    streaming parser never needs the full result list in memory. Only
+    the ChatGPT parser streams; the other parsers load the whole export
+    and can simply dump their list. Values
+    JSON cannot represent, such as lazily joined content, are written
+    using str(). Returns the number of conversations written.
+    """
+    count = 0
+    for conversation in conversations:
+        if orjson is not None:
+            out_fp.write(orjson.dumps(conversation, default=str, option=orjson.OPT_APPEND_NEWLINE))
+        else:
+            out_fp.write(json.dumps(conversation, default=str).encode('utf-8') + b'\n')
+        count += 1
+    return count
+
+@lru_cache(maxsize=8192)
+def format_timestamp(seconds):
+    """Format whole unix seconds as a local-time ISO 8601 string
+    
+    Messages in an export cluster around the same seconds, so results are
+    memoized instead of building a datetime for every timestamp.
+    """
+    return '%04d-%02d-%02dT%02d:%02d:%02d' % time.localtime(seconds)[:6]
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Checks that the Numba longest-chain kernel picks the same branch as the Python walk
+"""
+import random
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# The parsers import each other as top-level modules
+sys.path.insert(0, str(Path(__file__).parent))
+
+import chatgpt_parser
+
+def random_mapping(rng, size):
+    """Build a ChatGPT mapping with message-less nodes, missing parents and cycles"""
+    node_ids = [f'node-{rng.randrange(10**6)}-{i}' for i in range(size)]
+    mapping = {}
+    for i, node_id in enumerate(node_ids):
+        roll = rng.random()
+        if i == 0 or roll < 0.03:
+            parent = None
+        elif roll < 0.06:
+            parent = 'missing'
+        elif roll < 0.08:
+            # Any node, so some parent pointers form cycles
+            parent = rng.choice(node_ids)
+        else:
+            parent = node_ids[rng.randrange(max(0, i - 5), i)]
+        
+        node = {'id': node_id, 'parent': parent}
+        if rng.random() > 0.1:
+            node['message'] = {
+                'id': node_id,
+                'author': {'role': 'user'},
+                'content': {'content_type': 'text', 'parts': [node_id]},
+                'create_time': 1,
+            }
+        mapping[node_id] = node
+    
+    # Mapping order is arbitrary, children may come before their parents
+    items = list(mapping.items())
+    rng.shuffle(items)
+    return dict(items)
+
+@unittest.skipIf(chatgpt_parser.njit is None, "numba is not installed")
+class DeepestNodeJitTest(unittest.TestCase):
+    def parse(self, conv_data, jit):
+        threshold = 0 if jit else float('inf')
+        with mock.patch.object(chatgpt_parser, 'JIT_MIN_MESSAGES', threshold):
+            return chatgpt_parser.parse_conversation(conv_data)
+    
+    def test_matches_python_walk(self):
+        rng = random.Random(1)
+        for _ in range(300):
+            conv_data = {'id': 'c', 'create_time': 1, 'mapping': random_mapping(rng, rng.randrange(1, 60))}
+            self.assertEqual(self.parse(conv_data, jit=True), self.parse(conv_data, jit=False))
+    
+    def test_matches_python_walk_on_large_tree(self):
+        conv_data = {'id': 'c', 'create_time': 1, 'mapping': random_mapping(random.Random(2), 5000)}
+        self.assertEqual(self.parse(conv_data, jit=True), self.parse(conv_data, jit=False))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,16 +3,112 @@
 Parser for XAI/Grok export format
 """
 import sys
-import json
 from pathlib import Path
-from datetime import datetime
 
-def parse_export(file_path):
-    """Parse XAI/Grok export file and return normalized format"""
-    conversations = []
+from parser_common import format_timestamp, get_first, intern_str, load_json, message_id, parse_conversations
+
+# XAI/Grok role names mapped to canonical roles
+ROLE_MAP = {
+    'user': 'user',
+    'human': 'user',
+    'question': 'user',
+    'grok': 'assistant',
+    'assistant': 'assistant',
+    'ai': 'assistant',
+    'model': 'assistant',
+    'answer': 'assistant',
+    'system': 'system',
+}
+
+def parse_message(msg_data, i, default_created):
+    """Normalize a single XAI/Grok message"""
+    # XAI/Grok message format
+    role = get_first(msg_data, 'role', 'sender', 'type', default='')
+    
+    # Normalize role
+    role = intern_str(ROLE_MAP.get(role.lower(), role))
+    
+    message = {
+        'id': message_id(msg_data, i, 'id', 'message_id'),
+        'role': role,
+        'content': get_first(msg_data, 'content', 'text', 'message', default=''),
+        'created_at': get_first(msg_data, 'created_at', 'timestamp', default=default_created),
+    }
+    
+    # Handle timestamp conversion
+    if isinstance(message['created_at'], (int, float)):
+        message['created_at'] = format_timestamp(int(message['created_at']))
+    
+    # Extract model info if per-message
+    if 'model' in msg_data:
+        message['model'] = intern_str(msg_data['model'])
+    elif 'engine' in msg_data:
+        message['model'] = intern_str(msg_data['engine'])
+    
+    # Extract token counts if available
+    if 'token_count' in msg_data:
+        message['tokens'] = msg_data['token_count']
+    elif 'tokens' in msg_data:
+        message['tokens'] = msg_data['tokens']
+    
+    # Handle attachments/references
+    if 'attachments' in msg_data:
+        message['attachments'] = msg_data['attachments']
+    elif 'references' in msg_data:
+        message['attachments'] = msg_data['references']
     
-    with open(file_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    return message
+
+def parse_conversation(conv_data, now_iso):
+    """Normalize a single XAI/Grok conversation"""
+    # Extract conversation metadata
+    conversation = {
+        'id': get_first(conv_data, 'id', 'thread_id', 'conversation_id', default=''),
+        'title': get_first(conv_data, 'title', 'subject', default='Untitled'),
+        'created_at': get_first(conv_data, 'created_at', 'timestamp', default=''),
+        'updated_at': get_first(conv_data, 'updated_at', 'last_updated', default=''),
+        'model': 'grok-1',  # Default model
+        'messages': []
+    }
+    
+    # Parse timestamps (XAI might use Unix timestamps)
+    for ts_field in ['created_at', 'updated_at']:
+        ts_value = conversation[ts_field]
+        if ts_value and isinstance(ts_value, (int, float)):
+            # Unix timestamp
+            conversation[ts_field] = format_timestamp(int(ts_value))
+        elif not ts_value:
+            conversation[ts_field] = now_iso
+    
+    # Extract user info if available
+    if 'user' in conv_data:
+        conversation['user_id'] = conv_data['user'].get('id') if isinstance(conv_data['user'], dict) else str(conv_data['user'])
+    
+    # Parse messages
+    messages_data = []
+    if 'messages' in conv_data:
+        messages_data = conv_data['messages']
+    elif 'exchanges' in conv_data:
+        messages_data = conv_data['exchanges']
+    elif 'turns' in conv_data:
+        messages_data = conv_data['turns']
+    
+    conversation['messages'] = [
+        parse_message(msg_data, i, conversation['created_at'])
+        for i, msg_data in enumerate(messages_data)
+    ]
+    
+    # Try to extract model/settings from conversation metadata
+    if 'model' in conv_data:
+        conversation['model'] = intern_str(conv_data['model'])
+    elif 'settings' in conv_data and 'model' in conv_data['settings']:
+        conversation['model'] = intern_str(conv_data['settings']['model'])
+    
+    return conversation
+
+def parse_export(file_path, workers=None):
+    """Parse XAI/Grok export file and return normalized format"""
+    data = load_json(file_path)
     
     # Grok export format analysis based on the file we found
     # The format is typically a single large JSON with conversation threads
@@ -38,96 +134,7 @@ def parse_export(file_path):
     else:
         conv_list = data
     
-    for conv_data in conv_list:
-        try:
-            # Extract conversation metadata
-            conversation = {
-                'id': conv_data.get('id', conv_data.get('thread_id', conv_data.get('conversation_id', ''))),
-                'title': conv_data.get('title', conv_data.get('subject', 'Untitled')),
-                'created_at': conv_data.get('created_at', conv_data.get('timestamp', '')),
-                'updated_at': conv_data.get('updated_at', conv_data.get('last_updated', '')),
-                'model': 'grok-1',  # Default model
-                'messages': []
-            }
-            
-            # Parse timestamps (XAI might use Unix timestamps)
-            for ts_field in ['created_at', 'updated_at']:
-                ts_value = conversation[ts_field]
-                if ts_value and isinstance(ts_value, (int, float)):
-                    # Unix timestamp
-                    conversation[ts_field] = datetime.fromtimestamp(ts_value).isoformat()
-                elif not ts_value:
-                    conversation[ts_field] = datetime.now().isoformat()
-            
-            # Extract user info if available
-            if 'user' in conv_data:
-                conversation['user_id'] = conv_data['user'].get('id') if isinstance(conv_data['user'], dict) else str(conv_data['user'])
-            
-            # Parse messages
-            messages_data = []
-            if 'messages' in conv_data:
-                messages_data = conv_data['messages']
-            elif 'exchanges' in conv_data:
-                messages_data = conv_data['exchanges']
-            elif 'turns' in conv_data:
-                messages_data = conv_data['turns']
-            
-            for i, msg_data in enumerate(messages_data):
-                # XAI/Grok message format
-                role = msg_data.get('role', msg_data.get('sender', msg_data.get('type', '')))
-                
-                # Normalize role
-                if role.lower() in ['user', 'human', 'question']:
-                    role = 'user'
-                elif role.lower() in ['grok', 'assistant', 'ai', 'model', 'answer']:
-                    role = 'assistant'
-                elif role.lower() == 'system':
-                    role = 'system'
-                
-                message = {
-                    'id': msg_data.get('id', msg_data.get('message_id', f'msg_{i}')),
-                    'role': role,
-                    'content': msg_data.get('content', msg_data.get('text', msg_data.get('message', ''))),
-                    'created_at': msg_data.get('created_at', msg_data.get('timestamp', conversation['created_at'])),
-                }
-                
-                # Handle timestamp conversion
-                if isinstance(message['created_at'], (int, float)):
-                    message['created_at'] = datetime.fromtimestamp(message['created_at']).isoformat()
-                
-                # Extract model info if per-message
-                if 'model' in msg_data:
-                    message['model'] = msg_data['model']
-                elif 'engine' in msg_data:
-                    message['model'] = msg_data['engine']
-                
-                # Extract token counts if available
-                if 'token_count' in msg_data:
-                    message['tokens'] = msg_data['token_count']
-                elif 'tokens' in msg_data:
-                    message['tokens'] = msg_data['tokens']
-                
-                # Handle attachments/references
-                if 'attachments' in msg_data:
-                    message['attachments'] = msg_data['attachments']
-                elif 'references' in msg_data:
-                    message['attachments'] = msg_data['references']
-                
-                conversation['messages'].append(message)
-            
-            # Try to extract model/settings from conversation metadata
-            if 'model' in conv_data:
-                conversation['model'] = conv_data['model']
-            elif 'settings' in conv_data and 'model' in conv_data['settings']:
-                conversation['model'] = conv_data['settings']['model']
-            
-            conversations.append(conversation)
-            
-        except Exception as e:
-            print(f"Error parsing conversation: {e}")
-            continue
-    
-    return conversations
+    return parse_conversations(parse_conversation, conv_list, workers)
 
 if __name__ == '__main__':
     # Test the parser
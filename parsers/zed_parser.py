@@ -3,16 +3,103 @@
 Parser for Zed AI export format
 """
 import sys
-import json
 from pathlib import Path
-from datetime import datetime
 
-def parse_export(file_path):
-    """Parse Zed AI export file and return normalized format"""
-    conversations = []
+from parser_common import get_first, intern_str, load_json, message_id, parse_conversations
+
+# Zed role names mapped to canonical roles
+ROLE_MAP = {
+    'user': 'user',
+    'human': 'user',
+    'developer': 'user',
+    'assistant': 'assistant',
+    'ai': 'assistant',
+    'zed': 'assistant',
+    'system': 'system',
+}
+
+def parse_message(msg_data, i, default_created):
+    """Normalize a single Zed AI message"""
+    role = get_first(msg_data, 'role', 'type', default='')
+    
+    # Normalize Zed-specific roles
+    role = intern_str(ROLE_MAP.get(role.lower(), role))
+    
+    content = get_first(msg_data, 'content', 'text', default='')
+    
+    # Handle code blocks and context
+    if 'code' in msg_data:
+        code = msg_data['code']
+        language = msg_data.get('language', 'text')
+        content = f"{content}\n\n```{language}\n{code}\n```"
+    
+    if 'context' in msg_data:
+        # Add file context
+        context = msg_data['context']
+        if isinstance(context, dict):
+            if 'file' in context:
+                content = f"[File: {context['file']}]\n{content}"
+            if 'selection' in context:
+                content = f"[Selection: lines {context['selection']['start']}-{context['selection']['end']}]\n{content}"
+    
+    message = {
+        'id': message_id(msg_data, i, 'id'),
+        'role': role,
+        'content': content,
+        'created_at': get_first(msg_data, 'created_at', 'timestamp', default=default_created),
+    }
+    
+    # Extract additional metadata
+    if 'language' in msg_data:
+        message['language'] = msg_data['language']
+    
+    if 'diagnostics' in msg_data:
+        # Code diagnostics/errors
+        message['diagnostics'] = msg_data['diagnostics']
     
-    with open(file_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    if 'suggestions' in msg_data:
+        message['suggestions'] = msg_data['suggestions']
+    
+    return message
+
+def parse_conversation(conv_data, now_iso):
+    """Normalize a single Zed AI conversation"""
+    conversation = {
+        'id': get_first(conv_data, 'id', 'session_id', default=''),
+        'title': get_first(conv_data, 'title', 'file_path', default='Zed AI Session'),
+        'created_at': get_first(conv_data, 'created_at', 'started_at', default=''),
+        'updated_at': get_first(conv_data, 'updated_at', 'ended_at', default=''),
+        'model': intern_str(conv_data.get('model', 'zed-ai')),
+        'messages': []
+    }
+    
+    # Parse timestamps
+    if not conversation['created_at']:
+        conversation['created_at'] = now_iso
+    if not conversation['updated_at']:
+        conversation['updated_at'] = conversation['created_at']
+    
+    # Extract workspace/project context
+    if 'workspace' in conv_data:
+        conversation['workspace'] = conv_data['workspace']
+    if 'file_path' in conv_data:
+        conversation['file_path'] = conv_data['file_path']
+    if 'language' in conv_data:
+        conversation['language'] = conv_data['language']
+    
+    # Parse messages
+    messages_data = get_first(conv_data, 'messages', 'interactions', default=[])
+    
+    conversation['messages'] = [
+        parse_message(msg_data, i, conversation['created_at'])
+        for i, msg_data in enumerate(messages_data)
+    ]
+    
+    return conversation
+
+def parse_export(file_path, workers=None):
+    """Parse Zed AI export file and return normalized format"""
+    data = load_json(file_path)
     
     # Zed AI assistant format (from code editor)
     # Usually exports as workspace conversations
@@ -29,89 +116,7 @@ def parse_export(file_path):
     else:
         conv_list = data
     
-    for conv_data in conv_list:
-        try:
-            conversation = {
-                'id': conv_data.get('id', conv_data.get('session_id', '')),
-                'title': conv_data.get('title', conv_data.get('file_path', 'Zed AI Session')),
-                'created_at': conv_data.get('created_at', conv_data.get('started_at', '')),
-                'updated_at': conv_data.get('updated_at', conv_data.get('ended_at', '')),
-                'model': conv_data.get('model', 'zed-ai'),
-                'messages': []
-            }
-            
-            # Parse timestamps
-            if not conversation['created_at']:
-                conversation['created_at'] = datetime.now().isoformat()
-            if not conversation['updated_at']:
-                conversation['updated_at'] = conversation['created_at']
-            
-            # Extract workspace/project context
-            if 'workspace' in conv_data:
-                conversation['workspace'] = conv_data['workspace']
-            if 'file_path' in conv_data:
-                conversation['file_path'] = conv_data['file_path']
-            if 'language' in conv_data:
-                conversation['language'] = conv_data['language']
-            
-            # Parse messages
-            messages_data = conv_data.get('messages', conv_data.get('interactions', []))
-            
-            for i, msg_data in enumerate(messages_data):
-                role = msg_data.get('role', msg_data.get('type', ''))
-                
-                # Normalize Zed-specific roles
-                if role.lower() in ['user', 'human', 'developer']:
-                    role = 'user'
-                elif role.lower() in ['assistant', 'ai', 'zed']:
-                    role = 'assistant'
-                elif role.lower() == 'system':
-                    role = 'system'
-                
-                content = msg_data.get('content', msg_data.get('text', ''))
-                
-                # Handle code blocks and context
-                if 'code' in msg_data:
-                    code = msg_data['code']
-                    language = msg_data.get('language', 'text')
-                    content = f"{content}\n\n```{language}\n{code}\n```"
-                
-                if 'context' in msg_data:
-                    # Add file context
-                    context = msg_data['context']
-                    if isinstance(context, dict):
-                        if 'file' in context:
-                            content = f"[File: {context['file']}]\n{content}"
-                        if 'selection' in context:
-                            content = f"[Selection: lines {context['selection']['start']}-{context['selection']['end']}]\n{content}"
-                
-                message = {
-                    'id': msg_data.get('id', f'msg_{i}'),
-                    'role': role,
-                    'content': content,
-                    'created_at': msg_data.get('created_at', msg_data.get('timestamp', conversation['created_at'])),
-                }
-                
-                # Extract additional metadata
-                if 'language' in msg_data:
-                    message['language'] = msg_data['language']
-                
-                if 'diagnostics' in msg_data:
-                    # Code diagnostics/errors
-                    message['diagnostics'] = msg_data['diagnostics']
-                
-                if 'suggestions' in msg_data:
-                    message['suggestions'] = msg_data['suggestions']
-                
-                conversation['messages'].append(message)
-            
-            conversations.append(conversation)
-            
-        except Exception as e:
-            print(f"Error parsing conversation: {e}")
-            continue
-    
-    return conversations
+    return parse_conversations(parse_conversation, conv_list, workers)
 
 if __name__ == '__main__':
     # Test the parser
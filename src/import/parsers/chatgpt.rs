@@ -31,6 +31,8 @@ struct ChatGPTConversation {
     gizmo_id: Option<String>,
     #[serde(default)]
     is_archived: bool,
+    #[serde(default)]
+    current_node: Option<String>,
 }
 
 #[derive(Debug, Deserialize)]
@@ -156,7 +158,7 @@ fn parse_conversation(conv: &ChatGPTConversation) -> Result<(Conversation, Vec<M
         .unwrap_or(created_at);
     
     // Extract messages from the mapping
-    let messages = extract_messages(&conv.mapping)?;
+    let messages = extract_messages(&conv.mapping, conv.current_node.as_deref())?;
     
     // Determine model from messages
     let model = messages.iter()
@@ -183,53 +185,109 @@ fn parse_conversation(conv: &ChatGPTConversation) -> Result<(Conversation, Vec<M
 }
 
 /// Extract messages from ChatGPT's node mapping
-fn extract_messages(mapping: &HashMap<String, ChatGPTNode>) -> Result<Vec<Message>> {
-    let mut messages = Vec::new();
-    let mut processed = std::collections::HashSet::new();
-    
-    // Find root node(s)
-    let roots: Vec<_> = mapping.iter()
-        .filter(|(_, node)| node.parent.is_none())
-        .map(|(id, _)| id.clone())
+fn extract_messages(
+    mapping: &HashMap<String, ChatGPTNode>,
+    current_node: Option<&str>,
+) -> Result<Vec<Message>> {
+    // Import only the branch the user kept, like the Python parser, rather
+    // than flattening every regenerated branch into one conversation
+    let messages = message_chain(mapping, current_node)
+        .into_iter()
+        .filter_map(|node| node.message.as_ref())
+        .filter_map(parse_message)
         .collect();
     
-    // Traverse from each root
-    for root_id in roots {
-        traverse_messages(&root_id, mapping, &mut messages, &mut processed);
-    }
-    
-    // Sort messages by their order in the conversation
-    // Since we traverse in order, they should already be sorted
-    
     Ok(messages)
 }
 
-/// Recursively traverse the message tree
-fn traverse_messages(
-    node_id: &str,
-    mapping: &HashMap<String, ChatGPTNode>,
-    messages: &mut Vec<Message>,
-    processed: &mut std::collections::HashSet<String>,
-) {
-    if processed.contains(node_id) {
-        return;
+/// Pick the end of the displayed branch and return its messages, root first
+///
+/// `current_node` is used when it points at a message. Otherwise the
+/// deepest message wins, see `deepest_message`.
+fn message_chain<'a>(
+    mapping: &'a HashMap<String, ChatGPTNode>,
+    current_node: Option<&str>,
+) -> Vec<&'a ChatGPTNode> {
+    let has_message = |id: &str| mapping.get(id).map_or(false, |node| node.message.is_some());
+    
+    let end_node = match current_node {
+        Some(id) if has_message(id) => Some(id),
+        _ => deepest_message(mapping),
+    };
+    
+    // Stop at the first node without a message, like get_message_chain in
+    // the Python parser. The length bound guards against cycles in corrupt
+    // exports.
+    let mut chain = Vec::new();
+    let mut node_id = end_node;
+    
+    while let Some(id) = node_id {
+        if chain.len() >= mapping.len() {
+            break;
+        }
+        match mapping.get(id) {
+            Some(node) if node.message.is_some() => {
+                chain.push(node);
+                node_id = node.parent.as_deref();
+            }
+            _ => break,
+        }
     }
     
-    processed.insert(node_id.to_string());
+    chain.reverse();
+    chain
+}
+
+/// Find the message with the longest unbroken run of messages above it
+///
+/// Ties go to the smallest node id. This differs from the Python parser,
+/// which keeps the first node in mapping order: a `HashMap` does not keep
+/// that order, and the id keeps the pick deterministic. Depths are
+/// memoized while walking parent pointers, so each node is visited once.
+fn deepest_message(mapping: &HashMap<String, ChatGPTNode>) -> Option<&str> {
+    let mut depth: HashMap<&str, usize> = HashMap::with_capacity(mapping.len());
+    let mut deepest_node: Option<&str> = None;
+    let mut deepest = 0;
     
-    if let Some(node) = mapping.get(node_id) {
-        // Process this node's message
-        if let Some(msg) = &node.message {
-            if let Some(parsed) = parse_message(msg) {
-                messages.push(parsed);
+    for (node_id, node) in mapping {
+        if node.message.is_none() {
+            continue;
+        }
+        
+        // Climb until we reach the root or an ancestor whose depth is known
+        let mut path = Vec::new();
+        let mut parent = Some(node_id.as_str());
+        
+        while let Some(id) = parent {
+            if depth.contains_key(id) || path.len() >= mapping.len() {
+                break;
+            }
+            match mapping.get(id) {
+                Some(ancestor) => {
+                    path.push((id, ancestor.message.is_some()));
+                    parent = ancestor.parent.as_deref();
+                }
+                None => {
+                    parent = None;
+                }
             }
         }
         
-        // Process children
-        for child_id in &node.children {
-            traverse_messages(child_id, mapping, messages, processed);
+        // A node without a message breaks the chain and resets the count
+        let mut base = parent.and_then(|id| depth.get(id).copied()).unwrap_or(0);
+        for (id, is_message) in path.into_iter().rev() {
+            base = if is_message { base + 1 } else { 0 };
+            depth.insert(id, base);
+        }
+        
+        let id = node_id.as_str();
+        if base > deepest || (base == deepest && deepest_node.map_or(false, |best| id < best)) {
+            deepest = base;
+            deepest_node = Some(id);
         }
     }
+    
+    deepest_node
 }
 
 /// Parse a ChatGPT message into our domain model
@@ -312,4 +370,95 @@ fn normalize_model_name(slug: &str) -> String {
         "text-davinci-002-render-paid" => "gpt-3.5-turbo".to_string(),
         _ => slug.to_string(),
     }
-}
\ No newline at end of file
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use serde_json::json;
+    
+    /// Build a mapping from (id, parent, has_message) triples
+    fn mapping(nodes: &[(&str, Option<&str>, bool)]) -> HashMap<String, ChatGPTNode> {
+        nodes
+            .iter()
+            .map(|&(id, parent, has_message)| {
+                let message = has_message.then(|| json!({
+                    "id": id,
+                    "author": {"role": "user"},
+                    "content": {"content_type": "text", "parts": [id]},
+                }));
+                let node = json!({"id": id, "message": message, "parent": parent, "children": []});
+                (id.to_string(), serde_json::from_value(node).unwrap())
+            })
+            .collect()
+    }
+    
+    fn chain_ids(mapping: &HashMap<String, ChatGPTNode>, current_node: Option<&str>) -> Vec<String> {
+        message_chain(mapping, current_node)
+            .into_iter()
+            .map(|node| node.id.clone())
+            .collect()
+    }
+    
+    /// A regenerated reply: `old` is shorter than the `new` -> `newer` branch
+    fn regenerated() -> HashMap<String, ChatGPTNode> {
+        mapping(&[
+            ("root", None, false),
+            ("a", Some("root"), true),
+            ("b", Some("a"), true),
+            ("old", Some("b"), true),
+            ("new", Some("b"), true),
+            ("newer", Some("new"), true),
+        ])
+    }
+    
+    #[test]
+    fn follows_current_node() {
+        assert_eq!(chain_ids(&regenerated(), Some("old")), ["a", "b", "old"]);
+    }
+    
+    #[test]
+    fn falls_back_to_deepest_message() {
+        let mapping = regenerated();
+        assert_eq!(chain_ids(&mapping, None), ["a", "b", "new", "newer"]);
+        // Unknown ids and message-less nodes are not usable end points
+        assert_eq!(chain_ids(&mapping, Some("missing")), ["a", "b", "new", "newer"]);
+        assert_eq!(chain_ids(&mapping, Some("root")), ["a", "b", "new", "newer"]);
+    }
+    
+    #[test]
+    fn breaks_ties_by_smallest_id() {
+        let mapping = mapping(&[
+            ("a", None, true),
+            ("y", Some("a"), true),
+            ("x", Some("a"), true),
+        ]);
+        assert_eq!(chain_ids(&mapping, None), ["a", "x"]);
+    }
+    
+    #[test]
+    fn message_less_node_ends_the_chain() {
+        let mapping = mapping(&[
+            ("a", None, true),
+            ("gap", Some("a"), false),
+            ("c", Some("gap"), true),
+            ("d", Some("c"), true),
+            ("p", None, true),
+            ("q", Some("p"), true),
+            ("r", Some("q"), true),
+        ]);
+        // The gap resets the depth, so d only counts c and d
+        assert_eq!(chain_ids(&mapping, None), ["p", "q", "r"]);
+        assert_eq!(chain_ids(&mapping, Some("d")), ["c", "d"]);
+    }
+    
+    #[test]
+    fn parent_cycle_terminates() {
+        let mapping = mapping(&[
+            ("p", Some("q"), true),
+            ("q", Some("p"), true),
+        ]);
+        assert!(chain_ids(&mapping, Some("p")).len() <= mapping.len());
+        assert!(chain_ids(&mapping, None).len() <= mapping.len());
+    }
+}
@@ -44,11 +44,30 @@ pub async fn import_with_python(
         let file_path_str = path.to_string_lossy();
         let conversations_py = parse_fn.call1((file_path_str.as_ref(),))?;
         
-        // Convert Python objects to Rust structs
-        let conversations_list: &PyList = conversations_py.downcast()?;
+        // Convert Python objects to Rust structs. Parsers may return a list
+        // or a generator that streams conversations, so iterate generically.
         let mut batch = Vec::new();
+        let mut received = 0usize;
         
-        for conv_py in conversations_list {
+        for conv_py in conversations_py.iter()? {
+            let conv_py = match conv_py {
+                Ok(conv_py) => conv_py,
+                // A generator only opens and decodes the file on the first
+                // step, so an error here (missing or unreadable file, wrong
+                // top-level shape) must fail the import like a raising call.
+                Err(e) if received == 0 => {
+                    return Err(e).context("Python parser failed to read the export");
+                }
+                // Later errors mean a truncated or corrupt stream. Keep the
+                // conversations already parsed and record the failure.
+                Err(e) => {
+                    warn!("Failed to read conversation from parser after {} conversations: {}", received, e);
+                    stats.errors += 1;
+                    break;
+                }
+            };
+            received += 1;
+            
             match parse_conversation(py, conv_py, provider_type.as_str()) {
                 Ok((conv, messages)) => {
                     batch.push((conv, messages));